@@ -1,20 +1,15 @@
 import requests
-from typing import List, Dict, Any
-import random
 from dotenv import load_dotenv
 from langchain.chat_models import ChatOpenAI
 from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
-from langchain.text_splitter import CharacterTextSplitter
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import OpenAIEmbeddings
-from langchain.chains import RetrievalQA
-from langchain.schema import Document
+from langchain_core.output_parsers import StrOutputParser
 from typing import List, Dict, Any, Optional
 import os
-import time
-from datetime import datetime, timedelta
-from requests.exceptions import RequestException
+import re
+from collections import Counter
+from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import logging
 from bson.objectid import ObjectId
 
@@ -22,6 +17,27 @@ from bson.objectid import ObjectId
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+# Instagram/Threads API 호출이 TCP/TLS 연결을 재사용하도록 공용 세션 사용
+# (Retry는 기본적으로 GET 등 멱등 메서드만 재시도하므로 게시물 발행 POST는 재시도되지 않음)
+HTTP_SESSION = requests.Session()
+HTTP_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=32,
+    # 재시도를 모두 소진해도 RetryError 대신 마지막 응답을 돌려받아 raise_for_status()로 처리
+    max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=(429, 500, 502, 503, 504), raise_on_status=False)
+))
+
+# OpenAI 호출 1회당 제한 시간(초)과 재시도 횟수 (app.py의 변환 락 TTL이 이 합보다 길어야 함)
+LLM_REQUEST_TIMEOUT = 20
+LLM_MAX_RETRIES = 2
+
+# 해시태그 추출: '#' 뒤의 단어 문자(한글 포함)만 캡션 전체에서 한 번에 찾음
+HASHTAG_RE = re.compile(r"#(\w+)")
+
+# 게시물 목록에 필요한 필드와 통계 계산에 필요한 최소 필드
+MEDIA_FIELDS = "id,caption,media_type,media_url,thumbnail_url,permalink,timestamp"
+STATISTICS_FIELDS = "media_type,caption,timestamp"
+
 class InstagramAPI:
     BASE_URL = "https://graph.instagram.com/v12.0"
 
@@ -61,15 +77,15 @@ class InstagramAPI:
             raise ValueError("INSTAGRAM_ACCESS_TOKEN not found in .env file")
         return token
 
-    def get_user_media(self, limit: int = 10) -> List[Dict[str, Any]]:
+    def get_user_media(self, limit: int = 10, fields: str = MEDIA_FIELDS) -> List[Dict[str, Any]]:
         endpoint = f"{self.BASE_URL}/me/media"
         params = {
-            "fields": "id,caption,media_type,media_url,thumbnail_url,permalink,timestamp",
+            "fields": fields,
             "access_token": self.access_token,
             "limit": limit
         }
         try:
-            response = requests.get(endpoint, params=params)
+            response = HTTP_SESSION.get(endpoint, params=params, timeout=10)
             response.raise_for_status()
             return response.json().get("data", [])
         except requests.RequestException as e:
@@ -108,28 +124,27 @@ class InstagramAPI:
         return url
     
     def get_user_statistics(self, limit: int = 30) -> Dict[str, Any]:
-        media_items = self.get_user_media(limit)
+        # 통계에 쓰는 필드만 요청해 한 번의 호출로 응답 크기를 줄임
+        media_items = self.get_user_media(limit, fields=STATISTICS_FIELDS)
         
         post_types = {'IMAGE': 0, 'VIDEO': 0, 'CAROUSEL_ALBUM': 0}
-        hashtags = {}
-        posting_hours = {i: 0 for i in range(24)}
+        hashtags = Counter()
+        posting_hours = Counter()
 
         for item in media_items:
             post_types[item.get('media_type', 'IMAGE')] += 1
             
             caption = item.get('caption', '')
             if caption:
-                for tag in caption.split('#')[1:]:
-                    tag = tag.strip().lower()
-                    hashtags[tag] = hashtags.get(tag, 0) + 1
+                hashtags.update(HASHTAG_RE.findall(caption.lower()))
             
             timestamp = item.get('timestamp')
             if timestamp:
-                hour = int(timestamp.split('T')[1].split(':')[0])
-                posting_hours[hour] += 1
+                # ISO 8601 형식(YYYY-MM-DDTHH:MM:SS)에서 시(hour) 부분만 잘라냄
+                posting_hours[int(timestamp[11:13])] += 1
 
-        popular_hashtags = sorted(hashtags.items(), key=lambda x: x[1], reverse=True)[:5]
-        peak_posting_hours = sorted(posting_hours.items(), key=lambda x: x[1], reverse=True)[:3]
+        popular_hashtags = hashtags.most_common(5)
+        peak_posting_hours = posting_hours.most_common(3)
 
         return {
             'total_posts': len(media_items),
@@ -156,13 +171,13 @@ class ThreadAPI:
         print(f"With data: {data}")
 
         try:
-            response = requests.request(method, url, params=params, json=data)
+            response = HTTP_SESSION.request(method, url, params=params, json=data, timeout=30)
             response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
             print(f"API request failed: {e}")
-            if response.text:
-                print(f"Response content: {response.text}")
+            if e.response is not None and e.response.text:
+                print(f"Response content: {e.response.text}")
             raise
 
 
@@ -234,24 +249,27 @@ class ThreadAPI:
         return self._make_request("GET", f"{user_id}/threads_insights", params=params)
     
 
-def convert_post(caption: str, target_platform: str, has_image: bool) -> str:
-    converted_post = caption
+POST_TEMPLATES = {
+    "LinkedIn": "I just shared a new post on Instagram! Here's a sneak peek:\n\n{caption}\n\nFollow me on Instagram for more updates!\n\n#SocialMedia #Professional #Instagram",
+    "Facebook": "New Instagram Post Alert! 🚨\n\n{caption}\n\nHead over to my Instagram profile to see the full post and more content!",
+    "Thread": "Continuing from my recent Instagram post...\n\n{caption:.100}...\n\nThoughts?",
+    "YouTube Community": "📸 Instagram Update 📸\n\n{caption:.150}...\n\nCheck out my Instagram for the full post and more behind-the-scenes content!",
+}
+TWITTER_CHAR_LIMIT = 200
+TWITTER_LONG_TEMPLATE = "Check out my latest Instagram post! 📸\n\n{caption:.200}...\n\n#Instagram #Social"
+TWITTER_SHORT_TEMPLATE = "{caption}\n\n#Instagram #Social"
+IMAGE_NOTE = "\n\n[Image from Instagram]"
 
+def convert_post(caption: str, target_platform: str, has_image: bool) -> str:
+    # 플랫폼별 템플릿을 한 번에 포맷해 문자열을 반복해서 이어 붙이지 않음 ({caption:.N}은 앞 N글자로 자름)
     if target_platform == "Twitter":
-        converted_post = f"Check out my latest Instagram post! 📸\n\n{caption[:200]}..." if len(caption) > 200 else caption
-        converted_post += "\n\n#Instagram #Social"
-    elif target_platform == "LinkedIn":
-        converted_post = f"I just shared a new post on Instagram! Here's a sneak peek:\n\n{caption}\n\nFollow me on Instagram for more updates!"
-        converted_post += "\n\n#SocialMedia #Professional #Instagram"
-    elif target_platform == "Facebook":
-        converted_post = f"New Instagram Post Alert! 🚨\n\n{caption}\n\nHead over to my Instagram profile to see the full post and more content!"
-    elif target_platform == "Thread":
-        converted_post = f"Continuing from my recent Instagram post...\n\n{caption[:100]}...\n\nThoughts?"
-    elif target_platform == "YouTube Community":
-        converted_post = f"📸 Instagram Update 📸\n\n{caption[:150]}...\n\nCheck out my Instagram for the full post and more behind-the-scenes content!"
+        template = TWITTER_LONG_TEMPLATE if len(caption) > TWITTER_CHAR_LIMIT else TWITTER_SHORT_TEMPLATE
+    else:
+        template = POST_TEMPLATES.get(target_platform, "{caption}")
+    converted_post = template.format(caption=caption)
 
     if has_image:
-        converted_post += "\n\n[Image from Instagram]"
+        converted_post += IMAGE_NOTE
 
     return converted_post
 
@@ -264,23 +282,9 @@ class RAGConverter:
         self.llm = ChatOpenAI(
             temperature=0.7,
             model_name="chatgpt-4o-latest",
-            openai_api_key=openai_api_key
-        )
-        self.embeddings = OpenAIEmbeddings()
-        self.text_splitter = CharacterTextSplitter(chunk_size=1000, chunk_overlap=0)
-
-    def create_vector_store(self, text: str):
-        document = Document(page_content=text)
-        texts = self.text_splitter.split_documents([document])
-        return Chroma.from_documents(texts, self.embeddings)
-
-    def generate_enhanced_post(self, original_post: str, target_platform: str, has_image: bool) -> str:
-        vector_store = self.create_vector_store(original_post)
-        
-        qa_chain = RetrievalQA.from_chain_type(
-            llm=self.llm,
-            chain_type="stuff",
-            retriever=vector_store.as_retriever()
+            openai_api_key=openai_api_key,
+            request_timeout=LLM_REQUEST_TIMEOUT,
+            max_retries=LLM_MAX_RETRIES
         )
 
         prompt_template = """
@@ -300,20 +304,19 @@ class RAGConverter:
         Convert this post for {target_platform}:
         """
 
-        prompt = PromptTemplate(
+        # 프롬프트와 체인은 한 번만 만들어 모든 변환 요청에서 재사용
+        self.prompt = PromptTemplate(
             input_variables=["target_platform", "original_post", "has_image"],
             template=prompt_template
         )
+        self.chain = self.prompt | self.llm | StrOutputParser()
 
-        chain = LLMChain(llm=self.llm, prompt=prompt)
-
-        enhanced_post = chain.run(
-            target_platform=target_platform,
-            original_post=original_post,
-            has_image=has_image
-        )
-
-        return enhanced_post
+    def generate_enhanced_post(self, original_post: str, target_platform: str, has_image: bool) -> str:
+        return self.chain.invoke({
+            "target_platform": target_platform,
+            "original_post": original_post,
+            "has_image": has_image
+        })
 
 def main():
     try:
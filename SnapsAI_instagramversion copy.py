@@ -1,22 +1,107 @@
 import os
+import glob
+import pickle
 import sqlite3  
-from typing import List, Tuple, Optional
+from typing import Iterator, List, Tuple, Optional
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain_community.document_loaders import DirectoryLoader, PyMuPDFLoader
+from langchain_community.document_loaders import PyMuPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_chroma import Chroma
+import chromadb
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough
 from langchain.prompts import PromptTemplate, ChatPromptTemplate
 from langchain.prompts.chat import HumanMessagePromptTemplate
+from langchain.embeddings import CacheBackedEmbeddings
+from langchain.storage import LocalFileStore
 from langchain_core.documents import Document
 from PIL import Image
+import numpy as np
 import io
 import base64
+import hashlib
+import time
+from functools import lru_cache
+from operator import itemgetter
 import requests
-import facebook
-from facebook import GraphAPI
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+IMAGE_CACHE_DIR = os.getenv("SNAPS_IMAGE_CACHE_DIR", os.path.join(".cache", "images"))
+EMBEDDING_CACHE_DIR = os.getenv("SNAPS_EMBEDDING_CACHE_DIR", os.path.join(".cache", "embeddings"))
+# Instagram CDN URL은 서명이 만료되므로 오래 쓰이지 않은 이미지 캐시는 삭제
+IMAGE_CACHE_MAX_AGE = 7 * 24 * 3600
+SPLITS_CACHE_DIR = os.getenv("SNAPS_SPLITS_CACHE_DIR", os.path.join(".cache", "splits"))
+CHROMA_PERSIST_DIR = os.getenv("SNAPS_CHROMA_DIR", ".chroma")
+CHROMA_COLLECTION_NAME = "social_guides"
+CHROMA_BATCH_SIZE = 256
+
+# 플랫폼별 최대 이미지 크기
+PLATFORM_IMAGE_SIZES = {
+    "Facebook": (2048, 2048),
+    "LinkedIn": (1200, 627),
+}
+
+# 미디어 다운로드 시 TLS 연결을 재사용하기 위한 공용 세션 (일시적 오류는 짧은 백오프로 재시도)
+HTTP_SESSION = requests.Session()
+HTTP_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=32,
+    # 재시도를 모두 소진해도 RetryError 대신 마지막 응답을 돌려받아 raise_for_status()로 처리
+    max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=(429, 500, 502, 503, 504), raise_on_status=False)
+))
+MEDIA_PREFETCH_WORKERS = 8
+
+def load_single_pdf(path: str) -> List[Document]:
+    # 프로세스 풀에서 실행되므로 pickle 가능한 모듈 수준 함수로 둠
+    return PyMuPDFLoader(path).load()
+
+def create_cached_embeddings() -> CacheBackedEmbeddings:
+    # 텍스트 해시 + 모델 이름을 키로 임베딩을 디스크에 저장해 같은 청크는 다시 API로 보내지 않음
+    underlying = OpenAIEmbeddings()
+    return CacheBackedEmbeddings.from_bytes_store(
+        underlying, LocalFileStore(EMBEDDING_CACHE_DIR), namespace=underlying.model
+    )
+
+@lru_cache(maxsize=128)
+def fetch_image_bytes(url: str) -> bytes:
+    # 같은 게시물을 여러 플랫폼으로 변환할 때 다시 다운로드하지 않도록 원본 바이트를 메모리/디스크에 캐시
+    # (디코딩은 process_image에서 호출마다 수행하므로 thumbnail()의 in-place 수정이 캐시에 영향을 주지 않음)
+    cache_path = os.path.join(IMAGE_CACHE_DIR, hashlib.sha256(url.encode("utf-8")).hexdigest())
+    etag_path = cache_path + ".etag"
+    headers = {}
+    if os.path.exists(cache_path) and os.path.exists(etag_path):
+        with open(etag_path, encoding="utf-8") as f:
+            headers["If-None-Match"] = f.read().strip()
+
+    response = HTTP_SESSION.get(url, headers=headers, timeout=10)
+    if response.status_code == 304:
+        # 재사용된 항목은 정리 대상에서 빠지도록 수정 시각 갱신
+        os.utime(cache_path)
+        os.utime(etag_path)
+        with open(cache_path, "rb") as f:
+            return f.read()
+    response.raise_for_status()
+
+    os.makedirs(IMAGE_CACHE_DIR, exist_ok=True)
+    with open(cache_path, "wb") as f:
+        f.write(response.content)
+    etag = response.headers.get("ETag")
+    if etag:
+        with open(etag_path, "w", encoding="utf-8") as f:
+            f.write(etag)
+    elif os.path.exists(etag_path):
+        os.remove(etag_path)
+    return response.content
+
+def prune_image_cache(max_age: int = IMAGE_CACHE_MAX_AGE) -> None:
+    if not os.path.isdir(IMAGE_CACHE_DIR):
+        return
+    cutoff = time.time() - max_age
+    for entry in os.scandir(IMAGE_CACHE_DIR):
+        if entry.is_file() and entry.stat().st_mtime < cutoff:
+            os.remove(entry.path)
 
 class EnvironmentSetup:
     @staticmethod
@@ -27,16 +112,27 @@ class EnvironmentSetup:
 class ImageProcessor:
     @staticmethod
     def resize_image(image: Image.Image, max_size: Tuple[int, int]) -> Image.Image:
-        image.thumbnail(max_size)
+        # thumbnail()은 reducing_gap 기본값으로 큰 비율 축소 시 reduce()를 먼저 적용함
+        image.thumbnail(max_size, Image.Resampling.LANCZOS)
         return image
 
+    @staticmethod
+    def flatten_alpha(image: Image.Image) -> Image.Image:
+        # 흰 배경 위 알파 합성을 픽셀 배열 한 번의 연산으로 처리 (Image.new + paste 대신)
+        rgba = np.asarray(image if image.mode == "RGBA" else image.convert("RGBA")).astype(np.uint16)
+        rgb, alpha = rgba[..., :3], rgba[..., 3:4]
+        blended = (rgb * alpha + 255 * (255 - alpha) + 127) // 255
+        return Image.fromarray(blended.astype(np.uint8))
+
     @staticmethod
     def convert_to_format(image: Image.Image, format: str) -> Image.Image:
-        if image.format.lower() != format.lower():
-            new_image = Image.new("RGB", image.size, (255, 255, 255))
-            new_image.paste(image, mask=image.split()[3] if len(image.split()) > 3 else None)
-            return new_image
-        return image
+        # convert()/BytesIO 등으로 만들어진 이미지는 format이 None일 수 있음
+        if (image.format or "").lower() == format.lower():
+            return image
+        # split()으로 모든 채널을 복사하지 않고 mode 문자열로 알파 채널 여부만 확인
+        if image.mode in ("RGBA", "LA", "PA"):
+            return ImageProcessor.flatten_alpha(image)
+        return image if image.mode == "RGB" else image.convert("RGB")
 
     @staticmethod
     def apply_filter(image: Image.Image, filter_name: str) -> Image.Image:
@@ -51,23 +147,31 @@ class ImageProcessor:
         return base64.b64encode(buffered.getvalue()).decode()
 
 class InstagramAPI:
+    # facebook-sdk의 GraphAPI와 같은 엔드포인트를 공용 세션으로 직접 호출
+    BASE_URL = "https://graph.facebook.com"
+
     def __init__(self, access_token: str):
-        self.graph = GraphAPI(access_token)
+        self.access_token = access_token
+
+    def _get(self, path: str, params: Optional[dict] = None) -> dict:
+        params = {**(params or {}), 'access_token': self.access_token}
+        response = HTTP_SESSION.get(f"{self.BASE_URL}/{path.lstrip('/')}", params=params, timeout=10)
+        response.raise_for_status()
+        return response.json()
 
     def get_user_id(self, username: str) -> str:
         try:
-            response = self.graph.request(f'/{username}')
-            return response['id']
-        except facebook.GraphAPIError as e:
-            print(f"Facebook Graph API Error: {e.message}")
+            return self._get(username)['id']
+        except requests.RequestException as e:
+            print(f"Graph API Error: {e}")
             # API 응답의 전체 내용 출력
-            if hasattr(e, 'result'):
-                print(f"Full API Response: {e.result}")
+            if e.response is not None:
+                print(f"Full API Response: {e.response.text}")
             return None
 
     def get_recent_posts(self, user_id: str, limit: int = 10) -> List[dict]:
         try:
-            response = self.graph.request(f'/{user_id}/media', {
+            response = self._get(f'{user_id}/media', {
                 'fields': 'id,caption,media_type,media_url,thumbnail_url,permalink,timestamp',
                 'limit': limit
             })
@@ -76,10 +180,20 @@ class InstagramAPI:
             print(f"Error getting recent posts: {e}")
             return []
 
-    def download_image(self, url: str) -> Optional[Image.Image]:
+    def prefetch_images(self, urls: List[str]) -> None:
+        # 네트워크 대기 위주의 작업이므로 스레드로 병렬 다운로드해 캐시를 미리 채움
+        def fetch(url: str) -> None:
+            try:
+                fetch_image_bytes(url)
+            except Exception as e:
+                print(f"Error prefetching image: {e}")
+
+        with ThreadPoolExecutor(max_workers=MEDIA_PREFETCH_WORKERS) as executor:
+            list(executor.map(fetch, urls))
+
+    def download_image_bytes(self, url: str) -> Optional[bytes]:
         try:
-            response = requests.get(url)
-            return Image.open(io.BytesIO(response.content))
+            return fetch_image_bytes(url)
         except Exception as e:
             print(f"Error downloading image: {e}")
             return None
@@ -118,50 +232,88 @@ Converted Post:
 
     def _create_rag_chain(self):
         return (
-            {"context": self.retriever | self._format_docs, "input_post": RunnablePassthrough(), "source_platform": RunnablePassthrough(), "target_platform": RunnablePassthrough(), "image_included": RunnablePassthrough()}
+            {"context": itemgetter("input_post") | self.retriever | self._format_docs, "input_post": itemgetter("input_post"), "source_platform": itemgetter("source_platform"), "target_platform": itemgetter("target_platform"), "image_included": itemgetter("image_included")}
             | self.prompt
             | self.llm
             | StrOutputParser()
         )
 
-    def convert_post(self, input_post: str, source_platform: str, target_platform: str, image_included: bool) -> str:
-        return "".join(self.rag_chain.stream({
+    @staticmethod
+    def _chain_input(input_post: str, source_platform: str, target_platform: str, image_included: bool) -> dict:
+        return {
             "input_post": input_post,
             "source_platform": source_platform,
             "target_platform": target_platform,
             "image_included": "Yes" if image_included else "No"
-        }))
+        }
+
+    def convert_post(self, input_post: str, source_platform: str, target_platform: str, image_included: bool) -> str:
+        return self.rag_chain.invoke(self._chain_input(input_post, source_platform, target_platform, image_included))
+
+    def stream_convert_post(self, input_post: str, source_platform: str, target_platform: str, image_included: bool) -> Iterator[str]:
+        return self.rag_chain.stream(self._chain_input(input_post, source_platform, target_platform, image_included))
 
 class SocialMediaConverter:
     def __init__(self, db_dir: str, env_path: str):
         EnvironmentSetup.load_env(env_path)
-        self.documents = self.load_documents(db_dir)
-        print(f"Loaded {len(self.documents)} documents")
-        if not self.documents:
-            raise ValueError(f"No documents found in {db_dir}")
-        self.splits = self.split_documents(self.documents)
+        self.splits = self.load_splits(db_dir)
         print(f"Created {len(self.splits)} splits")
         self.vectorstore = self.create_vectorstore(self.splits)
         self.rag_chain = RAGChain(self.vectorstore)
         self.conversion_history = []
+        # 파일/DB에 이미 기록한 conversion_history 항목 수 (다음 저장 때는 이후 항목만 기록)
+        self._saved_count = 0
+        self._uploaded_count = 0
         self.image_processor = ImageProcessor()
+        prune_image_cache()
         
         instagram_access_token = os.getenv('INSTAGRAM_ACCESS_TOKEN')
         if not instagram_access_token:
             raise ValueError("INSTAGRAM_ACCESS_TOKEN not found in .env file")
         self.instagram_api = InstagramAPI(instagram_access_token)
 
+    @staticmethod
+    def find_pdfs(db_dir: str) -> List[str]:
+        return sorted(glob.glob(os.path.join(db_dir, "**", "*.pdf"), recursive=True))
+
+    @staticmethod
+    def corpus_fingerprint(paths: List[str]) -> str:
+        stats = [(path, os.path.getmtime(path), os.path.getsize(path)) for path in paths]
+        return hashlib.sha1(repr(stats).encode("utf-8")).hexdigest()
+
+    def load_splits(self, db_dir: str) -> List[Document]:
+        # PDF 목록/수정 시각/크기가 그대로면 이전 실행에서 저장한 분할 결과를 재사용
+        paths = self.find_pdfs(db_dir)
+        if not paths:
+            raise ValueError(f"No documents found in {db_dir}")
+        cache_path = os.path.join(SPLITS_CACHE_DIR, f"splits_{self.corpus_fingerprint(paths)}.pkl")
+        if os.path.exists(cache_path):
+            with open(cache_path, "rb") as f:
+                splits = pickle.load(f)
+            print(f"Loaded {len(splits)} cached splits from {cache_path}")
+            return splits
+
+        documents = self.load_documents(db_dir)
+        if not documents:
+            raise ValueError(f"No documents found in {db_dir}")
+        splits = self.split_documents(documents)
+
+        os.makedirs(SPLITS_CACHE_DIR, exist_ok=True)
+        for stale_path in glob.glob(os.path.join(SPLITS_CACHE_DIR, "splits_*.pkl")):
+            os.remove(stale_path)
+        with open(cache_path, "wb") as f:
+            pickle.dump(splits, f)
+        return splits
+
     @staticmethod
     def load_documents(db_dir: str) -> List[Document]:
         print(f"Attempting to load documents from {db_dir}")
-        loader = DirectoryLoader(
-            db_dir,
-            glob="**/*.pdf",
-            loader_cls=PyMuPDFLoader,
-            show_progress=True,
-            use_multithreading=True
-        )
-        documents = loader.load()
+        paths = SocialMediaConverter.find_pdfs(db_dir)
+        if not paths:
+            return []
+        # PDF 파싱 후 파이썬 쪽 후처리가 GIL에 묶이지 않도록 파일 단위로 프로세스를 나눠 병렬 처리
+        with ProcessPoolExecutor(max_workers=min(len(paths), os.cpu_count() or 1)) as executor:
+            documents = [doc for docs in executor.map(load_single_pdf, paths) for doc in docs]
         print(f"Loaded {len(documents)} documents")
         for doc in documents:
             print(f"Document source: {doc.metadata.get('source')}")
@@ -176,63 +328,102 @@ class SocialMediaConverter:
 
     @staticmethod
     def create_vectorstore(documents: List[Document]) -> Chroma:
-        return Chroma.from_documents(documents=documents, embedding=OpenAIEmbeddings())
+        client = chromadb.PersistentClient(path=CHROMA_PERSIST_DIR)
+        vectorstore = Chroma(
+            client=client,
+            collection_name=CHROMA_COLLECTION_NAME,
+            embedding_function=create_cached_embeddings()
+        )
+
+        # 청크 내용의 해시를 ID로 사용해 이미 저장된 청크는 다시 임베딩/색인하지 않음
+        docs_by_id = {hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest(): doc for doc in documents}
+        stored_ids = set(vectorstore.get(include=[])["ids"])
+
+        stale_ids = list(stored_ids - docs_by_id.keys())
+        if stale_ids:
+            vectorstore.delete(ids=stale_ids)
+
+        missing_ids = [doc_id for doc_id in docs_by_id if doc_id not in stored_ids]
+        for start in range(0, len(missing_ids), CHROMA_BATCH_SIZE):
+            batch_ids = missing_ids[start:start + CHROMA_BATCH_SIZE]
+            vectorstore.add_documents([docs_by_id[doc_id] for doc_id in batch_ids], ids=batch_ids)
+        print(f"Vector store: {len(missing_ids)} chunks added, {len(stale_ids)} removed, {len(docs_by_id)} total")
+        return vectorstore
 
 
     def get_instagram_posts(self, username: str, limit: int = 5) -> List[dict]:
         user_id = self.instagram_api.get_user_id(username)
-        if user_id:
-            return self.instagram_api.get_recent_posts(user_id, limit)
-        return []
+        if not user_id:
+            return []
+        posts = self.instagram_api.get_recent_posts(user_id, limit)
+        # 동영상의 media_url은 mp4이므로 이미지 캐시에 내려받지 않음
+        self.instagram_api.prefetch_images([
+            post['media_url'] for post in posts
+            if post.get('media_url') and post.get('media_type') != 'VIDEO'
+        ])
+        return posts
 
     def convert_instagram_post(self, post: dict, target_platform: str) -> Tuple[str, Optional[Image.Image]]:
         input_post = post.get('caption', '')
         image_url = post.get('media_url')
         
-        original_image = None
-        if image_url:
-            original_image = self.instagram_api.download_image(image_url)
-
-        converted_post = self.rag_chain.convert_post(input_post, "Instagram", target_platform, bool(original_image))
-        
         processed_image = None
-        if original_image:
-            processed_image = self.process_image(original_image, target_platform)
+        if image_url and post.get('media_type') != 'VIDEO':
+            image_data = self.instagram_api.download_image_bytes(image_url)
+            if image_data:
+                try:
+                    processed_image = self.process_image(image_data, target_platform)
+                except Exception as e:
+                    print(f"Error processing image: {e}")
+
+        # 이미지로 디코딩된 경우에만 이미지가 포함된 게시물로 변환
+        converted_post = self.rag_chain.convert_post(input_post, "Instagram", target_platform, processed_image is not None)
         
         self.conversion_history.append((input_post, "Instagram", target_platform, converted_post, image_url))
         return converted_post, processed_image
 
-    def process_image(self, image: Image.Image, target_platform: str) -> Image.Image:
-        if target_platform == "Facebook":
-            image = self.image_processor.resize_image(image, (2048, 2048))
-            image = self.image_processor.convert_to_format(image, "PNG")
-        elif target_platform == "LinkedIn":
-            image = self.image_processor.resize_image(image, (1200, 627))
-            image = self.image_processor.convert_to_format(image, "PNG")
+    def process_image(self, image_data: bytes, target_platform: str) -> Image.Image:
+        image = Image.open(io.BytesIO(image_data))
+        max_size = PLATFORM_IMAGE_SIZES.get(target_platform)
+        if max_size:
+            # JPEG는 디코딩 단계에서 1/2, 1/4, 1/8로 축소해 불필요한 픽셀을 디코딩하지 않음
+            image.draft("RGB", max_size)
+            if image.mode in ("RGBA", "LA"):
+                # draft()가 적용되지 않는 알파 이미지는 먼저 축소해 원본 해상도로 알파 합성하지 않음
+                image = self.image_processor.resize_image(image, max_size)
+                image = self.image_processor.convert_to_format(image, "PNG")
+            else:
+                image = self.image_processor.convert_to_format(image, "PNG")
+                image = self.image_processor.resize_image(image, max_size)
         # Add more platform-specific image processing as needed
         return image
 
     def save_conversion_history(self, filename: str):
-        with open(filename, 'w', encoding='utf-8') as f:
-            for input_post, source, target, converted_post, image_url in self.conversion_history:
+        with open(filename, 'a', encoding='utf-8') as f:
+            for input_post, source, target, converted_post, image_url in self.conversion_history[self._saved_count:]:
                 f.write(f"Source ({source}): {input_post}\n")
                 f.write(f"Target ({target}): {converted_post}\n")
                 if image_url:
                     f.write(f"Image: {image_url}\n")
                 f.write("\n")
+        self._saved_count = len(self.conversion_history)
         print(f"변환 내역이 {filename}에 저장되었습니다.")
 
     def upload_to_database(self, db_name: str):
         conn = sqlite3.connect(db_name)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
         cursor = conn.cursor()
         cursor.execute('''CREATE TABLE IF NOT EXISTS conversions
                           (id INTEGER PRIMARY KEY, input_post TEXT, source_platform TEXT, 
                            target_platform TEXT, converted_post TEXT, image_url TEXT)''')
-        for input_post, source, target, converted_post, image_url in self.conversion_history:
-            cursor.execute("INSERT INTO conversions (input_post, source_platform, target_platform, converted_post, image_url) VALUES (?, ?, ?, ?, ?)",
-                           (input_post, source, target, converted_post, image_url))
+        # conversion_history는 이미 컬럼 순서의 튜플이므로 아직 업로드하지 않은 항목만 한 트랜잭션에서 일괄 삽입
+        pending = self.conversion_history[self._uploaded_count:]
+        cursor.executemany("INSERT INTO conversions (input_post, source_platform, target_platform, converted_post, image_url) VALUES (?, ?, ?, ?, ?)",
+                           pending)
         conn.commit()
         conn.close()
+        self._uploaded_count += len(pending)
         print(f"변환 내역이 {db_name} 데이터베이스에 업로드되었습니다.")
 
 if __name__ == "__main__":
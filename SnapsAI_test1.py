@@ -1,20 +1,33 @@
 import requests
-from typing import List, Dict, Any
-import random
 from dotenv import load_dotenv
 from langchain.chat_models import ChatOpenAI
 from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
-from langchain.text_splitter import CharacterTextSplitter
-from langchain.vectorstores import Chroma
-from langchain.embeddings import OpenAIEmbeddings
-from langchain.chains import RetrievalQA
-from langchain.schema import Document
-from typing import List, Dict, Any
+from langchain_core.output_parsers import StrOutputParser
+from typing import List, Dict, Any, Tuple
 import os
+import re
+from collections import Counter
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Load environment variables
 load_dotenv()
+
+# 동시에 보낼 OpenAI 요청 수 상한
+MAX_CONCURRENT_REQUESTS = 8
+
+# Instagram API 호출이 TCP/TLS 연결을 재사용하도록 공용 세션 사용
+HTTP_SESSION = requests.Session()
+HTTP_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=32,
+    # 재시도를 모두 소진해도 RetryError 대신 마지막 응답을 돌려받아 raise_for_status()로 처리
+    max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=(429, 500, 502, 503, 504), raise_on_status=False)
+))
+
+# 해시태그 추출: '#' 뒤의 단어 문자(한글 포함)만 캡션 전체에서 한 번에 찾음
+HASHTAG_RE = re.compile(r"#(\w+)")
+
 class InstagramAPI:
     BASE_URL = "https://graph.instagram.com"
 
@@ -29,7 +42,7 @@ class InstagramAPI:
             "limit": limit
         }
         try:
-            response = requests.get(endpoint, params=params)
+            response = HTTP_SESSION.get(endpoint, params=params, timeout=10)
             response.raise_for_status()
             return response.json().get("data", [])
         except requests.RequestException as e:
@@ -70,25 +83,23 @@ class InstagramAPI:
         media_items = self.get_user_media(limit)
         
         post_types = {'IMAGE': 0, 'VIDEO': 0, 'CAROUSEL_ALBUM': 0}
-        hashtags = {}
-        posting_hours = {i: 0 for i in range(24)}
+        hashtags = Counter()
+        posting_hours = Counter()
 
         for item in media_items:
             post_types[item.get('media_type', 'IMAGE')] += 1
             
             caption = item.get('caption', '')
             if caption:
-                for tag in caption.split('#')[1:]:
-                    tag = tag.strip().lower()
-                    hashtags[tag] = hashtags.get(tag, 0) + 1
+                hashtags.update(HASHTAG_RE.findall(caption.lower()))
             
             timestamp = item.get('timestamp')
             if timestamp:
-                hour = int(timestamp.split('T')[1].split(':')[0])
-                posting_hours[hour] += 1
+                # ISO 8601 형식(YYYY-MM-DDTHH:MM:SS)에서 시(hour) 부분만 잘라냄
+                posting_hours[int(timestamp[11:13])] += 1
 
-        popular_hashtags = sorted(hashtags.items(), key=lambda x: x[1], reverse=True)[:5]
-        peak_posting_hours = sorted(posting_hours.items(), key=lambda x: x[1], reverse=True)[:3]
+        popular_hashtags = hashtags.most_common(5)
+        peak_posting_hours = posting_hours.most_common(3)
 
         return {
             'total_posts': len(media_items),
@@ -97,24 +108,27 @@ class InstagramAPI:
             'peak_posting_hours': peak_posting_hours
         }
 
-def convert_post(caption: str, target_platform: str, has_image: bool) -> str:
-    converted_post = caption
+POST_TEMPLATES = {
+    "LinkedIn": "I just shared a new post on Instagram! Here's a sneak peek:\n\n{caption}\n\nFollow me on Instagram for more updates!\n\n#SocialMedia #Professional #Instagram",
+    "Facebook": "New Instagram Post Alert! 🚨\n\n{caption}\n\nHead over to my Instagram profile to see the full post and more content!",
+    "Thread": "Continuing from my recent Instagram post...\n\n{caption:.100}...\n\nThoughts?",
+    "YouTube Community": "📸 Instagram Update 📸\n\n{caption:.150}...\n\nCheck out my Instagram for the full post and more behind-the-scenes content!",
+}
+TWITTER_CHAR_LIMIT = 200
+TWITTER_LONG_TEMPLATE = "Check out my latest Instagram post! 📸\n\n{caption:.200}...\n\n#Instagram #Social"
+TWITTER_SHORT_TEMPLATE = "{caption}\n\n#Instagram #Social"
+IMAGE_NOTE = "\n\n[Image from Instagram]"
 
+def convert_post(caption: str, target_platform: str, has_image: bool) -> str:
+    # 플랫폼별 템플릿을 한 번에 포맷해 문자열을 반복해서 이어 붙이지 않음 ({caption:.N}은 앞 N글자로 자름)
     if target_platform == "Twitter":
-        converted_post = f"Check out my latest Instagram post! 📸\n\n{caption[:200]}..." if len(caption) > 200 else caption
-        converted_post += "\n\n#Instagram #Social"
-    elif target_platform == "LinkedIn":
-        converted_post = f"I just shared a new post on Instagram! Here's a sneak peek:\n\n{caption}\n\nFollow me on Instagram for more updates!"
-        converted_post += "\n\n#SocialMedia #Professional #Instagram"
-    elif target_platform == "Facebook":
-        converted_post = f"New Instagram Post Alert! 🚨\n\n{caption}\n\nHead over to my Instagram profile to see the full post and more content!"
-    elif target_platform == "Thread":
-        converted_post = f"Continuing from my recent Instagram post...\n\n{caption[:100]}...\n\nThoughts?"
-    elif target_platform == "YouTube Community":
-        converted_post = f"📸 Instagram Update 📸\n\n{caption[:150]}...\n\nCheck out my Instagram for the full post and more behind-the-scenes content!"
+        template = TWITTER_LONG_TEMPLATE if len(caption) > TWITTER_CHAR_LIMIT else TWITTER_SHORT_TEMPLATE
+    else:
+        template = POST_TEMPLATES.get(target_platform, "{caption}")
+    converted_post = template.format(caption=caption)
 
     if has_image:
-        converted_post += "\n\n[Image from Instagram]"
+        converted_post += IMAGE_NOTE
 
     return converted_post
 
@@ -138,23 +152,8 @@ class RAGConverter:
         self.llm = ChatOpenAI(
             temperature=0.7,
             model_name="gpt-4o-2024-08-06",
-            openai_api_key=openai_api_key
-        )
-        self.embeddings = OpenAIEmbeddings()
-        self.text_splitter = CharacterTextSplitter(chunk_size=1000, chunk_overlap=0)
-
-    def create_vector_store(self, text: str):
-        document = Document(page_content=text)
-        texts = self.text_splitter.split_documents([document])
-        return Chroma.from_documents(texts, self.embeddings)
-
-    def generate_enhanced_post(self, original_post: str, target_platform: str, has_image: bool) -> str:
-        vector_store = self.create_vector_store(original_post)
-        
-        qa_chain = RetrievalQA.from_chain_type(
-            llm=self.llm,
-            chain_type="stuff",
-            retriever=vector_store.as_retriever()
+            openai_api_key=openai_api_key,
+            max_retries=5  # 429 등 일시적 오류는 클라이언트의 지수 백오프로 재시도
         )
 
         prompt_template = """
@@ -174,20 +173,28 @@ class RAGConverter:
         Answer in korean. 
         """
 
-        prompt = PromptTemplate(
+        # 프롬프트와 체인은 한 번만 만들어 모든 변환 요청에서 재사용
+        self.prompt = PromptTemplate(
             input_variables=["target_platform", "original_post", "has_image"],
             template=prompt_template
         )
+        self.chain = self.prompt | self.llm | StrOutputParser()
 
-        chain = LLMChain(llm=self.llm, prompt=prompt)
-
-        enhanced_post = chain.run(
-            target_platform=target_platform,
-            original_post=original_post,
-            has_image=has_image
-        )
-
-        return enhanced_post
+    def generate_enhanced_post(self, original_post: str, target_platform: str, has_image: bool) -> str:
+        # 프롬프트가 검색 결과를 사용하지 않으므로 캡션마다 벡터 스토어를 만들지 않고 바로 LLM에 전달
+        return self.chain.invoke({
+            "target_platform": target_platform,
+            "original_post": original_post,
+            "has_image": has_image
+        })
+
+    def generate_enhanced_posts(self, jobs: List[Tuple[str, str, bool]]) -> List[str]:
+        # (원본 게시물, 대상 플랫폼, 이미지 여부) 목록을 한 번의 batch 호출로 동시에 변환
+        inputs = [
+            {"target_platform": target_platform, "original_post": original_post, "has_image": has_image}
+            for original_post, target_platform, has_image in jobs
+        ]
+        return self.chain.batch(inputs, config={"max_concurrency": MAX_CONCURRENT_REQUESTS})
 
 def main():
     # Initialize Instagram API
@@ -205,23 +212,21 @@ def main():
     rag_converter = RAGConverter()
 
     # Convert posts using RAG
-    for post in formatted_posts:
-        caption = post["caption"]
-        has_image = len(post["media_urls"]) > 0
-
-        target_platforms = ["Twitter", "LinkedIn", "Facebook", "Thread", "YouTube Community"]
-
-        for platform in target_platforms:
-            # Use the original convert_post function
-            basic_converted_post = convert_post(caption, platform, has_image)
-
-            # Use the RAG-enhanced conversion
-            rag_converted_post = rag_converter.generate_enhanced_post(caption, platform, has_image)
-
-            print(f"Original Post: {caption[:100]}...")
-            print(f"Basic Converted Post for {platform}: {basic_converted_post[:100]}...")
-            print(f"RAG Converted Post for {platform}: {rag_converted_post[:100]}...")
-            print("-" * 50)
+    target_platforms = ["Twitter", "LinkedIn", "Facebook", "Thread", "YouTube Community"]
+    jobs = [
+        (post["caption"], platform, len(post["media_urls"]) > 0)
+        for post in formatted_posts
+        for platform in target_platforms
+    ]
+    rag_converted_posts = rag_converter.generate_enhanced_posts(jobs)
+
+    for (caption, platform, has_image), rag_converted_post in zip(jobs, rag_converted_posts):
+        basic_converted_post = convert_post(caption, platform, has_image)
+
+        print(f"Original Post: {caption[:100]}...")
+        print(f"Basic Converted Post for {platform}: {basic_converted_post[:100]}...")
+        print(f"RAG Converted Post for {platform}: {rag_converted_post[:100]}...")
+        print("-" * 50)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
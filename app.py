@@ -1,12 +1,23 @@
-from flask import Flask, render_template, request, jsonify, send_from_directory, redirect, url_for, session, flash
+from flask import Flask, render_template, request, jsonify, send_from_directory, redirect, url_for, session, flash, g
 from flask_pymongo import PyMongo
 from bson.objectid import ObjectId
+from bson import json_util
 from werkzeug.security import generate_password_hash, check_password_hash
 from SnapsAI import InstagramAPI, convert_post, RAGConverter, ThreadAPI
 import os
+from functools import wraps, lru_cache
 from dotenv import load_dotenv
 import logging
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import Future, ThreadPoolExecutor
+import hashlib
+import hmac
+import json
+import time
+import redis
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from flask_session import Session
 
@@ -20,11 +31,22 @@ def init_thread_api():
 
 init_thread_api()
 
+# LLM 클라이언트와 프롬프트 체인은 요청마다 만들지 않고 한 번만 생성해 재사용
+RAG_CONVERTER = RAGConverter()
+
 app = Flask(__name__)
-app.secret_key = os.urandom(24)
+# 여러 인스턴스가 Redis 세션을 공유하려면 서명 키가 같아야 함
+app.secret_key = os.getenv('SECRET_KEY') or os.urandom(24)
+
+# Redis configuration (세션, 사용자 문서 캐시, 변환 결과 캐시가 하나의 연결 풀을 공유)
+# 연결이 모두 사용 중이면 오류 대신 최대 5초까지 반환을 기다림
+redis_pool = redis.BlockingConnectionPool.from_url(os.getenv('REDIS_URL', 'redis://localhost:6379'), max_connections=50, timeout=5)
+redis_client = redis.Redis(connection_pool=redis_pool)
 
 # Session configuration
-app.config['SESSION_TYPE'] = 'filesystem'
+app.config['SESSION_TYPE'] = 'redis'
+app.config['SESSION_REDIS'] = redis_client
+app.config['SESSION_KEY_PREFIX'] = 'snaps:sess:'
 app.config['SESSION_PERMANENT'] = False
 app.config['SESSION_USE_SIGNER'] = True
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=5)
@@ -35,14 +57,257 @@ mongo_uri = os.getenv('MONGO_URI', 'mongodb://localhost:27017/snaps_db')
 app.config["MONGO_URI"] = mongo_uri
 mongo = PyMongo(app)
 
+USER_CACHE_TTL = 600
+AUTH_INFO_TTL = 7200
+AUTH_FIELDS = ("access_token", "thread_user_id", "instagram_id")
+LOGIN_PROJECTION = {"password": 1, **{field: 1 for field in AUTH_FIELDS}}
+CONVERT_CACHE_TTL = 3600
+# 재시도를 포함한 RAG 변환 최대 시간((LLM_MAX_RETRIES + 1) * LLM_REQUEST_TIMEOUT + 백오프)보다 길게 유지
+CONVERT_LOCK_TTL = 120
+CONVERT_LOCK_POLL_INTERVAL = 0.5
+POSTS_CACHE_TTL = 60
+THREAD_WINDOW_DAYS = 30
+PASSWORD_CHECK_TTL = 300
+PASSWORD_CHECK_CACHE_SIZE = 10000
+
+# 최근에 검증에 성공한 (저장된 해시, 비밀번호 HMAC) -> 만료 시각
+# 비밀번호를 바꾸면 저장된 해시가 달라지므로 이전 항목은 더 이상 일치하지 않음
+# 프로세스마다 임의로 만든 키로 HMAC을 계산해 메모리의 값으로 pbkdf2 대신 빠른 해시를 대입 공격할 수 없게 함
+PASSWORD_CHECK_HMAC_KEY = os.urandom(32)
+password_check_cache = OrderedDict()
+password_check_lock = threading.Lock()
+
+# 같은 사용자의 게시물 조회가 동시에 들어오면 진행 중인 Instagram 호출 하나를 함께 기다림
+inflight_posts = {}
+inflight_posts_lock = threading.Lock()
+
+# 대시보드의 Thread API 호출 전용 스레드 풀 (다른 엔드포인트의 작업 뒤에 대기하지 않도록 분리)
+DASHBOARD_EXECUTOR = ThreadPoolExecutor(max_workers=16)
+
+# Instagram OAuth 호출이 TCP/TLS 연결을 재사용하도록 공용 세션 사용
+OAUTH_SESSION = requests.Session()
+OAUTH_SESSION.mount("https://", HTTPAdapter(pool_connections=20, pool_maxsize=50))
+
 # Logging configuration
 logging.basicConfig(level=logging.DEBUG)
 
+# 로그인/회원가입의 이메일 조회가 컬렉션 전체를 스캔하지 않도록 인덱스 생성
+# (thread_user_id 인덱스는 Thread 계정 기준으로 조회할 분석 쿼리를 위해 미리 생성)
+try:
+    mongo.db.users.create_index("email", unique=True)
+    mongo.db.users.create_index("thread_user_id", sparse=True)
+except Exception as e:
+    app.logger.error(f"Error creating user indexes: {str(e)}")
+
 # Environment variables
 INSTAGRAM_APP_ID = os.getenv('INSTAGRAM_APP_ID')
 INSTAGRAM_APP_SECRET = os.getenv('INSTAGRAM_APP_SECRET')
 NGROK_URL = os.getenv('NGROK_URL')
 
+def get_cached_user(user_id):
+    # 요청마다 MongoDB를 조회하지 않도록 사용자 문서를 Redis에 TTL로 캐시 (Redis 장애 시 MongoDB로 폴백)
+    key = f"user:{user_id}"
+    try:
+        cached = redis_client.get(key)
+        if cached is not None:
+            return json_util.loads(cached)
+    except redis.RedisError as e:
+        app.logger.warning(f"Redis error while reading user cache: {str(e)}")
+    except ValueError as e:
+        app.logger.warning(f"Invalid user cache entry: {str(e)}")
+
+    # 비밀번호 해시는 캐시에 저장하지 않음
+    user = mongo.db.users.find_one({"_id": ObjectId(user_id)}, {"password": 0})
+    if user:
+        try:
+            redis_client.setex(key, USER_CACHE_TTL, json_util.dumps(user))
+        except redis.RedisError as e:
+            app.logger.warning(f"Redis error while writing user cache: {str(e)}")
+    return user
+
+def store_auth_info(user_id, user):
+    # 인증된 핸들러가 필요로 하는 토큰/연동 정보만 Redis 해시 하나에 저장해 HGETALL 한 번으로 조회
+    auth_info = {"user_id": str(user_id)}
+    auth_info.update({field: str(user[field]) for field in AUTH_FIELDS if user.get(field)})
+    key = f"auth_service:{user_id}"
+    try:
+        pipe = redis_client.pipeline()
+        pipe.delete(key)
+        pipe.hset(key, mapping=auth_info)
+        pipe.expire(key, AUTH_INFO_TTL)
+        pipe.execute()
+    except redis.RedisError as e:
+        app.logger.warning(f"Redis error while writing auth info: {str(e)}")
+    return auth_info
+
+def get_auth_info(user_id):
+    try:
+        cached = redis_client.hgetall(f"auth_service:{user_id}")
+        if cached:
+            return {key.decode(): value.decode() for key, value in cached.items()}
+    except redis.RedisError as e:
+        app.logger.warning(f"Redis error while reading auth info: {str(e)}")
+
+    user = mongo.db.users.find_one({"_id": ObjectId(user_id)}, {field: 1 for field in AUTH_FIELDS})
+    if not user:
+        return None
+    return store_auth_info(user_id, user)
+
+def invalidate_cached_user(user_id):
+    try:
+        redis_client.delete(f"user:{user_id}", f"auth_service:{user_id}", f"posts:{user_id}")
+    except redis.RedisError as e:
+        app.logger.warning(f"Redis error while invalidating user cache: {str(e)}")
+
+def get_cached_conversion(cache_key):
+    try:
+        cached = redis_client.get(cache_key)
+    except redis.RedisError as e:
+        app.logger.warning(f"Redis error while reading conversion cache: {str(e)}")
+        return None
+    return json.loads(cached) if cached else None
+
+def acquire_convert_lock(lock):
+    # redis-py Lock은 보유자마다 고유 토큰을 저장하고, 해제 시 토큰이 같을 때만 삭제
+    try:
+        return lock.acquire(blocking=False)
+    except redis.RedisError as e:
+        # Redis 장애 시에는 락 없이 바로 생성
+        app.logger.warning(f"Redis error while acquiring convert lock: {str(e)}")
+        return True
+
+def convert_lock_exists(lock):
+    try:
+        return lock.locked()
+    except redis.RedisError as e:
+        app.logger.warning(f"Redis error while checking convert lock: {str(e)}")
+        return False
+
+def release_convert_lock(lock):
+    try:
+        lock.release()
+    except redis.RedisError as e:
+        # 락이 이미 만료되어 다른 요청이 잡은 경우에도 그 락은 삭제하지 않음
+        app.logger.warning(f"Redis error while releasing convert lock: {str(e)}")
+
+@lru_cache(maxsize=1024)
+def create_instagram_api(user_id):
+    # 사용자별 InstagramAPI 인스턴스를 재사용해 생성 시 DB 조회를 반복하지 않음
+    return InstagramAPI(user_id, mongo.db.client)
+
+def get_instagram_api(user_id, access_token):
+    # 토큰은 인스턴스에 고정하지 않고 모든 워커가 공유하는 인증 정보(g.user)의 값으로 매 요청 갱신
+    instagram_api = create_instagram_api(user_id)
+    instagram_api.access_token = access_token
+    return instagram_api
+
+def fetch_and_format_posts(user_id, access_token):
+    instagram_api = get_instagram_api(user_id, access_token)
+    formatted_posts = instagram_api.format_posts(instagram_api.get_user_media())
+    # get_user_media는 API 오류 시 빈 목록을 반환하므로 빈 결과는 캐시하지 않음
+    if formatted_posts:
+        try:
+            redis_client.setex(f"posts:{user_id}", POSTS_CACHE_TTL, json.dumps(formatted_posts))
+        except redis.RedisError as e:
+            app.logger.warning(f"Redis error while caching posts: {str(e)}")
+    return formatted_posts
+
+def get_formatted_posts(user_id, access_token):
+    try:
+        cached = redis_client.get(f"posts:{user_id}")
+        if cached:
+            return json.loads(cached)
+    except redis.RedisError as e:
+        app.logger.warning(f"Redis error while reading posts cache: {str(e)}")
+
+    with inflight_posts_lock:
+        future = inflight_posts.get(user_id)
+        if future is not None:
+            is_owner = False
+        else:
+            future = Future()
+            inflight_posts[user_id] = future
+            is_owner = True
+
+    if not is_owner:
+        return future.result()
+
+    # 처음 들어온 요청이 자기 스레드에서 호출하고, 결과를 기다리던 요청들에 전달
+    try:
+        future.set_result(fetch_and_format_posts(user_id, access_token))
+    except Exception as e:
+        future.set_exception(e)
+    finally:
+        # 완료된 호출은 목록에서 제거해 다음 요청은 캐시 또는 새 호출을 사용
+        with inflight_posts_lock:
+            del inflight_posts[user_id]
+    return future.result()
+
+@lru_cache(maxsize=2)
+def thread_window(now_minute):
+    # 같은 분(minute)에 들어온 요청은 계산된 조회 구간을 공유
+    end_ts = now_minute * 60
+    start_ts = end_ts - THREAD_WINDOW_DAYS * 86400
+    return (
+        start_ts,
+        end_ts,
+        time.strftime("%Y-%m-%d", time.localtime(start_ts)),
+        time.strftime("%Y-%m-%d", time.localtime(end_ts))
+    )
+
+def get_thread_window():
+    return thread_window(int(time.time()) // 60)
+
+def verify_password(password_hash, password):
+    # 같은 자격 증명으로 짧은 시간 안에 반복 로그인할 때 pbkdf2 계산을 건너뜀
+    key = (password_hash, hmac.new(PASSWORD_CHECK_HMAC_KEY, password.encode(), hashlib.sha256).hexdigest())
+    now = time.monotonic()
+    with password_check_lock:
+        expires_at = password_check_cache.get(key)
+        if expires_at is not None:
+            if expires_at > now:
+                return True
+            del password_check_cache[key]
+
+    if not check_password_hash(password_hash, password):
+        return False
+
+    with password_check_lock:
+        password_check_cache[key] = now + PASSWORD_CHECK_TTL
+        password_check_cache.move_to_end(key)
+        while len(password_check_cache) > PASSWORD_CHECK_CACHE_SIZE:
+            password_check_cache.popitem(last=False)
+    return True
+
+def current_user_oid():
+    # 로그인 시 저장한 12바이트 ObjectId를 사용해 매 요청마다 hex 문자열을 파싱하지 않음
+    oid_bytes = session.get('user_oid_bytes')
+    if oid_bytes:
+        return ObjectId(oid_bytes)
+    return ObjectId(session['user_id'])
+
+def login_required(view):
+    # 페이지 라우트용: 로그인하지 않았으면 로그인 페이지로 이동
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        if 'user_id' not in session:
+            flash('로그인이 필요합니다.', 'error')
+            return redirect(url_for('login'))
+        return view(*args, **kwargs)
+    return wrapped
+
+def require_auth(view):
+    # 로그인 여부를 확인하고 인증 정보를 g.user에 담아 핸들러에 전달
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        if 'user_id' not in session:
+            return jsonify({"error": "Not authenticated"}), 401
+        g.user = get_auth_info(session['user_id'])
+        if g.user is None:
+            return jsonify({"error": "User not found"}), 404
+        return view(*args, **kwargs)
+    return wrapped
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -60,13 +325,10 @@ def content_management():
     return render_template('content_management.html')
 
 @app.route('/statistics')
+@login_required
 def statistics():
-    if 'user_id' not in session:
-        flash('로그인이 필요합니다.', 'error')
-        return redirect(url_for('login'))
-    
-    user = mongo.db.users.find_one({"_id": ObjectId(session['user_id'])})
-    if not user or not user.get('access_token'):
+    auth_info = get_auth_info(session['user_id'])
+    if not auth_info or not auth_info.get('access_token'):
         flash('Instagram 계정을 연동해주세요.', 'warning')
         return redirect(url_for('my_page'))
     
@@ -89,8 +351,7 @@ def register():
             flash('비밀번호가 일치하지 않습니다.', 'error')
             return render_template('register.html', error='비밀번호가 일치하지 않습니다.')
 
-        existing_user = mongo.db.users.find_one({"email": email})
-        if existing_user:
+        if mongo.db.users.count_documents({"email": email}, limit=1):
             flash('이미 사용 중인 이메일입니다.', 'error')
             return render_template('register.html', error='이미 사용 중인 이메일입니다.')
 
@@ -121,10 +382,12 @@ def login():
         email = request.form['email']
         password = request.form['password']
 
-        user = mongo.db.users.find_one({"email": email})
+        user = mongo.db.users.find_one({"email": email}, LOGIN_PROJECTION)
 
-        if user and check_password_hash(user['password'], password):
+        if user and verify_password(user['password'], password):
             session['user_id'] = str(user['_id'])
+            session['user_oid_bytes'] = user['_id'].binary
+            store_auth_info(session['user_id'], user)
             flash('로그인 되었습니다.', 'success')
             return redirect(url_for('my_page'))
         else:
@@ -135,40 +398,34 @@ def login():
 @app.route('/logout')
 def logout():
     session.pop('user_id', None)
+    session.pop('user_oid_bytes', None)
     flash('로그아웃 되었습니다.', 'success')
     return redirect(url_for('index'))
 
 @app.route('/my-page')
+@login_required
 def my_page():
-    if 'user_id' not in session:
-        flash('로그인이 필요합니다.', 'error')
-        return redirect(url_for('login'))
-    
-    user = mongo.db.users.find_one({"_id": ObjectId(session['user_id'])})
+    user = get_cached_user(session['user_id'])
     instagram_linked = bool(user and user.get('access_token'))
     thread_linked = bool(user and user.get('thread_user_id'))
     return render_template('my_page.html', user=user, instagram_linked=instagram_linked, thread_linked=thread_linked)
 
 @app.route('/instagram-auth')
+@login_required
 def instagram_auth():
-    if 'user_id' not in session:
-        flash('로그인이 필요합니다.', 'error')
-        return redirect(url_for('login'))
     redirect_uri = f"{NGROK_URL}/auth/instagram/callback"
     return redirect(f"https://api.instagram.com/oauth/authorize?client_id={INSTAGRAM_APP_ID}&redirect_uri={redirect_uri}&scope=user_profile,user_media&response_type=code")
 
 @app.route('/auth/instagram/callback')
+@login_required
 def instagram_callback():
-    if 'user_id' not in session:
-        return redirect(url_for('login'))
-    
     code = request.args.get('code')
     if not code:
         flash('Instagram authorization failed')
         return redirect(url_for('my_page'))
 
     redirect_uri = f"{NGROK_URL}/auth/instagram/callback"
-    response = requests.post('https://api.instagram.com/oauth/access_token', data={
+    response = OAUTH_SESSION.post('https://api.instagram.com/oauth/access_token', timeout=10, data={
         'client_id': INSTAGRAM_APP_ID,
         'client_secret': INSTAGRAM_APP_SECRET,
         'grant_type': 'authorization_code',
@@ -186,9 +443,10 @@ def instagram_callback():
 
     try:
         mongo.db.users.update_one(
-            {"_id": ObjectId(session['user_id'])},
+            {"_id": current_user_oid()},
             {"$set": {"instagram_id": instagram_user_id, "access_token": access_token}}
         )
+        invalidate_cached_user(session['user_id'])
         flash('Instagram account successfully linked')
     except Exception as e:
         app.logger.error(f"Error updating user with Instagram data: {str(e)}")
@@ -197,35 +455,29 @@ def instagram_callback():
     return redirect(url_for('my_page'))
 
 @app.route('/refresh_instagram_token', methods=['POST'])
+@require_auth
 def refresh_instagram_token():
-    if 'user_id' not in session:
-        return jsonify({"error": "Not authenticated"}), 401
-    
-    user = mongo.db.users.find_one({"_id": ObjectId(session['user_id'])})
-    if not user or not user.get('access_token'):
+    if not g.user.get('access_token'):
         return jsonify({"error": "Instagram account not linked"}), 400
 
     try:
-        instagram_api = InstagramAPI(str(session['user_id']), mongo.db.client)
+        instagram_api = get_instagram_api(str(session['user_id']), g.user['access_token'])
         new_token, new_expiry = instagram_api.refresh_token()
+        # 캐시된 인증 정보에 이전 토큰이 남아 새 토큰을 덮어쓰지 않도록 무효화
+        invalidate_cached_user(session['user_id'])
         return jsonify({"success": True, "message": "Instagram token refreshed successfully"})
     except Exception as e:
         app.logger.error(f"Error refreshing Instagram token: {str(e)}")
         return jsonify({"error": "Failed to refresh Instagram token. Please relink your account."}), 500
 
 @app.route('/fetch_posts', methods=['POST'])
+@require_auth
 def fetch_posts():
-    if 'user_id' not in session:
-        return jsonify({"error": "Not authenticated"}), 401
-    
-    user = mongo.db.users.find_one({"_id": ObjectId(session['user_id'])})
-    if not user or not user.get('access_token'):
+    if not g.user.get('access_token'):
         return jsonify({"error": "Instagram account not linked"}), 400
 
     try:
-        instagram_api = InstagramAPI(str(session['user_id']), mongo.db.client)
-        media_items = instagram_api.get_user_media()
-        formatted_posts = instagram_api.format_posts(media_items)
+        formatted_posts = get_formatted_posts(str(session['user_id']), g.user['access_token'])
         
         app.logger.info(f"Fetched {len(formatted_posts)} posts for user {session['user_id']}")
         
@@ -238,16 +490,13 @@ def fetch_posts():
 
 
 @app.route('/fetch_instagram_stats', methods=['GET'])
+@require_auth
 def fetch_instagram_stats():
-    if 'user_id' not in session:
-        return jsonify({"error": "로그인이 필요합니다."}), 401
-    
-    user = mongo.db.users.find_one({"_id": ObjectId(session['user_id'])})
-    if not user or not user.get('access_token'):
+    if not g.user.get('access_token'):
         return jsonify({"error": "Instagram 계정이 연동되어 있지 않습니다."}), 400
 
     try:
-        instagram_api = InstagramAPI(str(session['user_id']), mongo.db.client)
+        instagram_api = get_instagram_api(str(session['user_id']), g.user['access_token'])
         stats = instagram_api.get_user_statistics(limit=30)
         return jsonify(stats)
     except Exception as e:
@@ -268,34 +517,67 @@ def convert():
         if not caption or not target_platform:
             return jsonify({"error": "Missing required fields"}), 400
 
-        basic_converted_post = convert_post(caption, target_platform, has_image)
+        # 같은 입력에 대한 변환 결과는 Redis에 캐시하고, 동시에 들어온 중복 요청은 락으로 한 번만 생성
+        input_hash = hashlib.sha1(f"{target_platform}|{has_image}|{caption}".encode()).hexdigest()
+        cache_key = f"convert:{input_hash}"
+        lock = redis_client.lock(f"convert:lock:{input_hash}", timeout=CONVERT_LOCK_TTL)
+
+        cached = get_cached_conversion(cache_key)
+        if cached is not None:
+            return jsonify(cached)
+
+        lock_acquired = acquire_convert_lock(lock)
+        # 다른 요청이 생성 중이면 결과가 캐시되거나 락이 풀릴 때까지 기다림
+        deadline = time.monotonic() + CONVERT_LOCK_TTL
+        while not lock_acquired and time.monotonic() < deadline:
+            time.sleep(CONVERT_LOCK_POLL_INTERVAL)
+            cached = get_cached_conversion(cache_key)
+            if cached is not None:
+                return jsonify(cached)
+            if not convert_lock_exists(lock):
+                # 생성 중이던 요청이 실패해 락을 풀었으면 직접 락을 잡고 생성
+                lock_acquired = acquire_convert_lock(lock)
+
+        if lock_acquired:
+            # 락을 잡기 직전에 다른 요청이 결과를 저장했을 수 있으므로 한 번 더 확인
+            cached = get_cached_conversion(cache_key)
+            if cached is not None:
+                release_convert_lock(lock)
+                return jsonify(cached)
 
-        rag_converter = RAGConverter()
-        rag_converted_post = rag_converter.generate_enhanced_post(caption, target_platform, has_image)
-
-        return jsonify({
-            "basicConvertedPost": basic_converted_post,
-            "ragConvertedPost": rag_converted_post
-        })
+        try:
+            # 기본 변환은 문자열 템플릿이라 즉시 끝나므로 요청 스레드에서 바로 실행
+            result = {
+                "basicConvertedPost": convert_post(caption, target_platform, has_image),
+                "ragConvertedPost": RAG_CONVERTER.generate_enhanced_post(caption, target_platform, has_image)
+            }
+            try:
+                redis_client.setex(cache_key, CONVERT_CACHE_TTL, json.dumps(result))
+            except redis.RedisError as e:
+                app.logger.warning(f"Redis error while caching conversion: {str(e)}")
+        finally:
+            if lock_acquired:
+                release_convert_lock(lock)
+
+        return jsonify(result)
     except Exception as e:
         app.logger.error(f"Error in /convert route: {str(e)}", exc_info=True)
         return jsonify({"error": str(e)}), 500
 
 # Thread 계정 연동 라우트
 @app.route('/link_thread_account', methods=['POST'])
+@require_auth
 def link_thread_account():
-    if 'user_id' not in session:
-        return jsonify({"error": "Not authenticated"}), 401
-
     thread_user_id = request.json.get('thread_user_id')
     if not thread_user_id:
         return jsonify({"error": "Thread user ID is required"}), 400
 
     try:
         result = mongo.db.users.update_one(
-            {"_id": ObjectId(session['user_id'])},
+            {"_id": current_user_oid()},
             {"$set": {"thread_user_id": thread_user_id}}
         )
+        invalidate_cached_user(session['user_id'])
         if result.modified_count > 0:
             return jsonify({"success": True, "message": "Thread account linked successfully"})
         else:
@@ -305,61 +587,80 @@ def link_thread_account():
         return jsonify({"error": "Failed to link Thread account"}), 500
 
 @app.route('/check_thread_account', methods=['GET'])
+@require_auth
 def check_thread_account():
-    if 'user_id' not in session:
-        return jsonify({"error": "Not authenticated"}), 401
-
-    user = mongo.db.users.find_one({"_id": ObjectId(session['user_id'])})
-    if not user:
-        return jsonify({"error": "User not found"}), 404
-
-    return jsonify({"linked": bool(user.get('thread_user_id'))})
+    return jsonify({"linked": bool(g.user.get('thread_user_id'))})
 
 @app.route('/fetch_thread_stats', methods=['GET'])
+@require_auth
 def fetch_thread_stats():
-    if 'user_id' not in session:
-        return jsonify({"error": "Not authenticated"}), 401
-
-    user = mongo.db.users.find_one({"_id": ObjectId(session['user_id'])})
-    if not user or not user.get('thread_user_id'):
+    if not g.user.get('thread_user_id'):
         return jsonify({"error": "Thread account not linked"}), 400
 
     try:
-        thread_api = ThreadAPI(user['thread_user_id'])
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=30)
-        stats = thread_api.get_user_insights(int(start_date.timestamp()), int(end_date.timestamp()))
+        start_ts, end_ts, _, _ = get_thread_window()
+        stats = thread_api.get_user_insights(
+            user_id=g.user['thread_user_id'],
+            since=start_ts,
+            until=end_ts
+        )
         return jsonify(stats)
     except Exception as e:
         app.logger.error(f"Error fetching Thread stats: {str(e)}")
         return jsonify({"error": "Failed to fetch statistics. Please try again later."}), 500
 
 @app.route('/fetch_thread_posts', methods=['GET'])
+@require_auth
 def fetch_thread_posts():
-    if 'user_id' not in session:
-        return jsonify({"error": "Not authenticated"}), 401
-
-    user = mongo.db.users.find_one({"_id": ObjectId(session['user_id'])})
-    if not user or not user.get('thread_user_id'):
+    if not g.user.get('thread_user_id'):
         return jsonify({"error": "Thread account not linked"}), 400
 
     try:
-        thread_api = ThreadAPI(user['thread_user_id'])
-        end_date = datetime.now().strftime("%Y-%m-%d")
-        start_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
-        threads = thread_api.get_user_threads(since=start_date, until=end_date, limit=10)
+        _, _, start_date, end_date = get_thread_window()
+        threads = thread_api.get_user_threads(user_id=g.user['thread_user_id'], since=start_date, until=end_date, limit=10)
         return jsonify(threads)
     except Exception as e:
         app.logger.error(f"Error fetching Thread posts: {str(e)}")
         return jsonify({"error": "Failed to fetch Thread posts. Please try again later."}), 500
 
+@app.route('/dashboard', methods=['GET'])
+@require_auth
+def dashboard():
+    if not g.user.get('thread_user_id'):
+        return jsonify({"error": "Thread account not linked"}), 400
+
+    try:
+        # Thread 통계는 전용 풀에서, 게시물은 요청 스레드에서 동시에 요청
+        thread_user_id = g.user['thread_user_id']
+        start_ts, end_ts, start_date, end_date = get_thread_window()
+        stats_future = DASHBOARD_EXECUTOR.submit(
+            thread_api.get_user_insights,
+            user_id=thread_user_id,
+            since=start_ts,
+            until=end_ts
+        )
+        posts = thread_api.get_user_threads(
+            user_id=thread_user_id,
+            since=start_date,
+            until=end_date,
+            limit=10
+        )
+        return jsonify({
+            "user": {
+                "instagram_linked": bool(g.user.get('access_token')),
+                "thread_user_id": thread_user_id
+            },
+            "stats": stats_future.result(),
+            "posts": posts
+        })
+    except Exception as e:
+        app.logger.error(f"Error fetching dashboard data: {str(e)}")
+        return jsonify({"error": "Failed to fetch dashboard data. Please try again later."}), 500
+
 @app.route('/upload_to_thread', methods=['POST'])
+@require_auth
 def upload_to_thread():
-    if 'user_id' not in session:
-        return jsonify({"error": "Not authenticated"}), 401
-
-    user = mongo.db.users.find_one({"_id": ObjectId(session['user_id'])})
-    if not user or not user.get('thread_user_id'):
+    if not g.user.get('thread_user_id'):
         return jsonify({"error": "Thread account not linked"}), 400
 
     data = request.json
@@ -372,9 +673,8 @@ def upload_to_thread():
         return jsonify({"error": "Content is required"}), 400
 
     try:
-        thread_api = ThreadAPI()
         result = thread_api.post_thread(
-            user_id=user['thread_user_id'],
+            user_id=g.user['thread_user_id'],
             content=content,
             media_type=media_type,
             image_url=image_url,